@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import json
+import argparse
+import urllib.parse
+from pathlib import Path
+from html.parser import HTMLParser
+from concurrent.futures import ProcessPoolExecutor
+
+# Attributes that point at something the site has to serve
+LINK_ATTRIBUTES = {'src', 'href', 'hx-get', 'poster'}
+EXTERNAL_SCHEMES = ('http:', 'https:', 'mailto:', 'tel:', 'data:', 'javascript:')
+MISSING_MEDIA_RE = re.compile(r'\[File not found: (.*?)\]')
+
+# Files in a post directory that are generated rather than referenced
+POST_SUPPORT_FILES = {'post.html', 'meta.json', 'related.json'}
+
+class _LinkCollector(HTMLParser):
+    """Collect (line, attribute, url) for every link-like attribute in a page"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if name in LINK_ATTRIBUTES and value:
+                self.links.append((self.getpos()[0], name, value.strip()))
+
+    handle_startendtag = handle_starttag
+
+def _scan_page(page_path):
+    """Parse one HTML page; runs in a worker process"""
+    with open(page_path, 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    collector = _LinkCollector()
+    collector.feed(html)
+    collector.close()
+
+    missing_media = MISSING_MEDIA_RE.findall(html)
+    return page_path, collector.links, missing_media
+
+def _resolve_url(url, page_url):
+    """Turn a link into a site path, or None if it is external or a pure fragment"""
+    if url.startswith('#') or url.lower().startswith(EXTERNAL_SCHEMES) or url.startswith('//'):
+        return None
+
+    path = urllib.parse.urljoin(page_url, url)
+    path = urllib.parse.unquote(urllib.parse.urlsplit(path).path)
+    if path.endswith('/'):
+        path += 'index.html'
+    return path
+
+def check_site(base_dir=None, max_asset_size=5 * 1024 * 1024, jobs=None):
+    """
+    Check every link and media reference in the generated site
+
+    Args:
+        base_dir: Base directory of the website
+        max_asset_size: Assets larger than this many bytes are reported as oversized
+        jobs: Number of worker processes used to parse pages (default: CPU count)
+    """
+    base_dir = Path(base_dir if base_dir else '.').resolve()
+    webpage_dir = base_dir / 'webpage'
+
+    # Every servable file, as the URL path the site would use for it
+    output_paths = {}
+    for root, dirs, files in os.walk(base_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in files:
+            path = Path(root) / name
+            output_paths['/' + path.relative_to(base_dir).as_posix()] = path
+
+    pages = [base_dir / 'index.html']
+    pages += sorted(webpage_dir.glob('posts/*/post.html'))
+    pages += sorted(webpage_dir.glob('indexes/*.html'))
+    pages += sorted(webpage_dir.glob('about/*.html'))
+    pages = [str(page) for page in pages if page.exists()]
+
+    broken = []
+    missing_media = []
+    referenced = set()
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for page_path, links, missing in executor.map(_scan_page, pages, chunksize=16):
+            page_url = '/' + Path(page_path).relative_to(base_dir).as_posix()
+
+            for name in missing:
+                missing_media.append({'page': page_url, 'file': name})
+
+            for line, attribute, url in links:
+                target = _resolve_url(url, page_url)
+                if target is None:
+                    continue
+                if target in output_paths:
+                    referenced.add(target)
+                else:
+                    broken.append({'page': page_url, 'line': line, 'attribute': attribute, 'url': url})
+
+    oversized = []
+    unreferenced = []
+    for url_path, path in output_paths.items():
+        if not url_path.startswith('/webpage/'):
+            continue
+        size = path.stat().st_size
+        if size > max_asset_size:
+            oversized.append({'path': url_path, 'size': size})
+
+        # Media copied into a post directory should be used by that post
+        if url_path.startswith('/webpage/posts/') and path.name not in POST_SUPPORT_FILES:
+            if url_path not in referenced:
+                unreferenced.append({'path': url_path, 'size': size})
+
+    report = {
+        'summary': {
+            'pages': len(pages),
+            'files': len(output_paths),
+            'broken_links': len(broken),
+            'missing_media': len(missing_media),
+            'oversized_assets': len(oversized),
+            'unreferenced_assets': len(unreferenced)
+        },
+        'broken_links': broken,
+        'missing_media': missing_media,
+        'oversized_assets': sorted(oversized, key=lambda a: a['size'], reverse=True),
+        'unreferenced_assets': sorted(unreferenced, key=lambda a: a['path'])
+    }
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check links and media in the generated site")
+    parser.add_argument('--base-dir', help="Base directory of the website (default: current directory)")
+    parser.add_argument('--output', '-o', help="Write the JSON report to this file instead of stdout")
+    parser.add_argument('--max-asset-size', type=float, default=5, help="Flag assets larger than this many MB (default: 5)")
+    parser.add_argument('--jobs', '-j', type=int, help="Worker processes for parsing pages (default: CPU count)")
+    args = parser.parse_args()
+
+    report = check_site(args.base_dir, int(args.max_asset_size * 1024 * 1024), args.jobs)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        summary = report['summary']
+        print(f"Checked {summary['pages']} pages: {summary['broken_links']} broken links, "
+              f"{summary['missing_media']} missing media, {summary['oversized_assets']} oversized "
+              f"and {summary['unreferenced_assets']} unreferenced assets")
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    # Oversized and unreferenced assets are warnings; broken references fail the build
+    if report['broken_links'] or report['missing_media']:
+        exit(1)
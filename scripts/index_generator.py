@@ -2,16 +2,56 @@
 import os
 import json
 import re
+import math
+import hashlib
+import argparse
 from pathlib import Path
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, Counter
+
+import numpy as np
+
+from optimize_assets import minify_css
+
+# Common English words ignored when comparing post bodies
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further
+had has have having he her here hers herself him himself his how i if in into is it its itself
+just me more most my myself no nor not now of off on once only or other our ours ourselves out
+over own same she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when where which
+while who whom why will with would you your yours yourself yourselves also get got like one
+really thing things use used using way well
+""".split())
+
+# Related posts compare fixed-size hashed feature vectors, so a post's vector
+# never depends on the rest of the corpus and cached scores stay valid
+RELATED_FEATURES = 1 << 14
+RELATED_STATE_VERSION = 2
+
+# Selectors needed to paint the sidebar and the home index before main.css arrives
+CRITICAL_SELECTOR_RE = re.compile(
+    r'^(?::root|html|body|h1|h2|a|main|#menu-toggle|#content-area)\b'
+    r'|^\.(?:sidebar|nav-|index-|quote-|github-icon|htmx-)'
+)
 
 class IndexGenerator:
-    def __init__(self, base_dir=None):
+    def __init__(self, base_dir=None, related_k=5, first_paint_items=10, prefetch_items=3):
         self.base_dir = Path(base_dir if base_dir else '/app')
         self.posts_dir = self.base_dir / 'webpage/posts'
         self.indexes_dir = self.base_dir / 'webpage/indexes'
         
+        # Related posts: neighbours kept per post, and the build cache of
+        # feature vectors and neighbour lists used for incremental updates
+        self.related_k = related_k
+        self.related_state_file = self.base_dir / '.cache' / 'related_index.json'
+        
+        # First paint: latest items inlined into index.html, and how many
+        # posts per view the client may prefetch while idle
+        self.first_paint_items = first_paint_items
+        self.prefetch_items = prefetch_items
+        
         # Ensure indexes directory exists
         self.indexes_dir.mkdir(exist_ok=True, parents=True)
         
@@ -180,7 +220,326 @@ class IndexGenerator:
         
         print(f"Generated search.json with {len(search_data)} posts")
 
-    def generate_all_indexes(self):
+    def _extract_terms(self, html, tags):
+        """Turn a post body and its tags into a bag of terms"""
+        # Drop code listings, scripts and styles, then strip the remaining markup
+        text = re.sub(r'<(pre|script|style)\b.*?</\1>', ' ', html, flags=re.S | re.I)
+        # The template's date/tags line is boilerplate; tags are added below
+        text = re.sub(r'<div class="post-metadata">.*?</div>', ' ', text, flags=re.S)
+        text = re.sub(r'<[^>]+>', ' ', text)
+        text = re.sub(r'&\w+;', ' ', text).lower()
+        
+        terms = Counter(
+            word for word in re.findall(r'[a-z][a-z0-9]+', text)
+            if word not in STOPWORDS
+        )
+        
+        # Tags are weighted like a handful of body mentions; the prefix keeps
+        # them from colliding with ordinary words
+        for tag in tags:
+            terms[f"tag:{tag.lower()}"] += 3
+        
+        return dict(terms)
+
+    def _hash_features(self, terms):
+        """Map a bag of terms onto a signed, L2-normalised hashed feature vector"""
+        features = defaultdict(float)
+        for term, count in terms.items():
+            digest = hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest()
+            value = int.from_bytes(digest, 'little')
+            # The low bit picks the sign so collisions tend to cancel out
+            sign = 1.0 if value & 1 else -1.0
+            features[(value >> 1) % RELATED_FEATURES] += sign * (1 + math.log(count))
+        
+        norm = math.sqrt(sum(weight * weight for weight in features.values())) or 1.0
+        indices = sorted(features)
+        return indices, [round(features[i] / norm, 8) for i in indices]
+
+    def _load_related_state(self):
+        """Load the related-posts build cache, or an empty state"""
+        try:
+            with open(self.related_state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if (state.get('version') == RELATED_STATE_VERSION and state.get('k') == self.related_k
+                    and state.get('features') == RELATED_FEATURES):
+                return state
+        except (OSError, ValueError):
+            pass
+        return {'docs': {}, 'related': {}}
+
+    def _build_feature_matrix(self, paths, docs):
+        """Stack the cached sparse feature vectors into a dense matrix"""
+        matrix = np.zeros((len(paths), RELATED_FEATURES), dtype=np.float64)
+        for i, path in enumerate(paths):
+            matrix[i, docs[path]['indices']] = docs[path]['weights']
+        return matrix
+
+    def _score_rows(self, matrix, rows):
+        """Cosine scores of the given rows against every post, rounded so runs agree"""
+        return np.round(matrix[rows] @ matrix.T, 6)
+
+    def _rank_neighbours(self, path, candidates):
+        """Keep the k best positive (path, score) candidates; ties break on path"""
+        best = sorted(((n, float(s)) for n, s in candidates if n != path and s > 0),
+                      key=lambda candidate: (-candidate[1], candidate[0]))
+        return best[:self.related_k]
+
+    def _rank_all(self, paths, matrix):
+        """Cold rebuild: every post scored against every other post"""
+        scores = self._score_rows(matrix, list(range(len(paths))))
+        return {path: self._rank_neighbours(path, zip(paths, row)) for path, row in zip(paths, scores)}
+
+    def _generate_related_posts(self, posts, verify=False):
+        """
+        Write a top-k related.json into every post directory
+        
+        Similarity is cosine over hashed feature vectors of post bodies and
+        tags. A vector depends only on its own post, so the score of two
+        unchanged posts never changes and is kept in .cache/related_index.json.
+        Each run scores only new or edited posts against everyone; other lists
+        merge those scores into their cached neighbours, and only a full list
+        that lost a neighbour to an edit or removal is rescored. With verify,
+        the result is checked against a cold rebuild.
+        """
+        state = self._load_related_state()
+        previous = state['related']
+        by_path = {post['path']: post for post in posts}
+        paths = list(by_path)
+        
+        # Reuse cached vectors for posts whose content has not changed
+        docs = {}
+        changed = set()
+        for post in posts:
+            with open(self.posts_dir / post['path'] / 'post.html', 'r', encoding='utf-8') as f:
+                html = f.read()
+            key = json.dumps([html, post['tags']])
+            digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+            
+            cached = state['docs'].get(post['path'])
+            if cached and cached['hash'] == digest and post['path'] in previous:
+                docs[post['path']] = cached
+            else:
+                indices, weights = self._hash_features(self._extract_terms(html, post['tags']))
+                docs[post['path']] = {'hash': digest, 'indices': indices, 'weights': weights}
+                changed.add(post['path'])
+        removed = set(previous) - set(paths)
+        stale = changed | removed
+        
+        related = {path: [tuple(n) for n in previous[path]] for path in paths if path not in changed}
+        rows_scored = 0
+        matrix = None
+        if stale:
+            matrix = self._build_feature_matrix(paths, docs)
+            row = {path: i for i, path in enumerate(paths)}
+            
+            # New and edited posts are scored against everyone: O(N * changed)
+            changed_paths = [path for path in paths if path in changed]
+            changed_scores = {}
+            if changed_paths:
+                scores = self._score_rows(matrix, [row[p] for p in changed_paths])
+                for path, row_scores in zip(changed_paths, scores):
+                    changed_scores[path] = row_scores
+                    related[path] = self._rank_neighbours(path, zip(paths, row_scores))
+                rows_scored += len(changed_paths)
+            
+            full = []
+            for path in paths:
+                if path in changed:
+                    continue
+                old = related[path]
+                kept = [(n, s) for n, s in old if n not in stale]
+                
+                # A full list that lost a neighbour may be refilled by any post
+                if len(kept) < len(old) and len(old) == self.related_k:
+                    full.append(path)
+                    continue
+                
+                # Otherwise only a changed post can enter the list
+                if changed_paths:
+                    candidates = kept + [(c, changed_scores[c][row[path]]) for c in changed_paths]
+                    related[path] = self._rank_neighbours(path, candidates)
+                else:
+                    related[path] = kept
+            
+            if full:
+                scores = self._score_rows(matrix, [row[p] for p in full])
+                for path, row_scores in zip(full, scores):
+                    related[path] = self._rank_neighbours(path, zip(paths, row_scores))
+                rows_scored += len(full)
+        
+        updated = sum(1 for path in paths if related[path] != [tuple(n) for n in previous.get(path, [])])
+        
+        if verify:
+            if matrix is None:
+                matrix = self._build_feature_matrix(paths, docs)
+            cold = self._rank_all(paths, matrix)
+            mismatched = [path for path in paths if cold[path] != related[path]]
+            if mismatched:
+                raise RuntimeError(f"Incremental related posts differ from a cold rebuild for: {', '.join(mismatched)}")
+            print("Verified related posts against a cold rebuild.")
+        
+        # Titles and dates can change without touching the lists, so render
+        # every file but only rewrite the ones whose contents differ
+        written = 0
+        for path in paths:
+            related_data = [{
+                'title': by_path[n]['title'],
+                'date': by_path[n]['date'],
+                'tags': by_path[n]['tags'],
+                'path': n,
+                'url': by_path[n]['url'],
+                'score': round(score, 3)
+            } for n, score in related[path]]
+            
+            content = json.dumps(related_data, indent=2)
+            related_file = self.posts_dir / path / 'related.json'
+            if related_file.exists() and related_file.read_text(encoding='utf-8') == content:
+                continue
+            with open(related_file, 'w', encoding='utf-8') as f:
+                f.write(content)
+            written += 1
+        
+        # Save the build cache for the next incremental run
+        state = {
+            'version': RELATED_STATE_VERSION,
+            'k': self.related_k,
+            'features': RELATED_FEATURES,
+            'docs': docs,
+            'related': {path: [list(n) for n in related[path]] for path in paths}
+        }
+        self.related_state_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.related_state_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        
+        print(f"Updated related posts: {len(changed)} changed, {len(removed)} removed, "
+              f"{rows_scored} rows scored, {updated} lists updated, {written} files written")
+
+    def _generate_tag_index(self, posts):
+        """Generate tags.json with post counts and tag co-occurrence counts"""
+        tags = sorted({tag for post in posts for tag in post['tags']})
+        column = {tag: j for j, tag in enumerate(tags)}
+        
+        membership = np.zeros((len(posts), len(tags)), dtype=np.int32)
+        for i, post in enumerate(posts):
+            for tag in post['tags']:
+                membership[i, column[tag]] = 1
+        cooccurrence = membership.T @ membership
+        
+        tag_data = {}
+        for j, tag in enumerate(tags):
+            others = [k for k in np.argsort(-cooccurrence[j], kind='stable')
+                      if k != j and cooccurrence[j, k] > 0]
+            tag_data[tag] = {
+                'count': int(cooccurrence[j, j]),
+                'related': {tags[k]: int(cooccurrence[j, k]) for k in others}
+            }
+        
+        with open(self.indexes_dir / 'tags.json', 'w', encoding='utf-8') as f:
+            json.dump(tag_data, f, indent=2)
+        
+        print(f"Generated tags.json with {len(tags)} tags")
+
+    def _split_css_blocks(self, css):
+        """Split CSS into (prelude, body) pairs, one per top-level block"""
+        css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+        blocks = []
+        depth = 0
+        prelude_start = 0
+        for i, char in enumerate(css):
+            if char == '{':
+                if depth == 0:
+                    prelude = css[prelude_start:i].strip()
+                    body_start = i + 1
+                depth += 1
+            elif char == '}':
+                depth -= 1
+                if depth == 0:
+                    blocks.append((prelude, css[body_start:i]))
+                    prelude_start = i + 1
+        return blocks
+
+    def _filter_critical_css(self, css):
+        """Keep the rules (including inside @media) that match critical selectors"""
+        rules = []
+        for prelude, body in self._split_css_blocks(css):
+            if prelude.startswith('@media'):
+                inner = self._filter_critical_css(body)
+                if inner:
+                    rules.append(f"{prelude}{{{inner}}}")
+            elif prelude.startswith('@'):
+                # Keyframes, font faces etc. can wait for the full stylesheet
+                continue
+            elif any(CRITICAL_SELECTOR_RE.match(selector.strip()) for selector in prelude.split(',')):
+                rules.append(f"{prelude}{{{body}}}")
+        return '\n'.join(rules)
+
+    def _replace_marked_section(self, html, name, content):
+        """Replace the text between <!-- name:start --> and <!-- name:end --> markers"""
+        pattern = re.compile(rf'(<!-- {name}:start -->).*?(<!-- {name}:end -->)', re.S)
+        if not pattern.search(html):
+            print(f"Warning: index.html has no {name} markers, skipping")
+            return html
+        return pattern.sub(lambda m: f"{m.group(1)}{content}{m.group(2)}", html, count=1)
+
+    def _generate_first_paint(self, posts, additional_headers):
+        """Inline critical CSS and the latest index items into index.html"""
+        index_file = self.base_dir / 'index.html'
+        css_file = self.base_dir / 'webpage' / 'style' / 'main.css'
+        if not index_file.exists() or not css_file.exists():
+            print("Skipping first paint bundle: index.html or main.css not found")
+            return
+        
+        with open(css_file, 'r', encoding='utf-8') as f:
+            critical_css = minify_css(self._filter_critical_css(f.read()))
+        
+        # Latest items only; the full list is one click (or one swap) away
+        latest_html = self._generate_index_content(
+            posts[:self.first_paint_items],
+            title="Latest",
+            additional_headers=additional_headers
+        )
+        if len(posts) > self.first_paint_items:
+            latest_html += ('<a class="index-more" hx-get="/webpage/indexes/index-all.html" '
+                            'hx-target="#content-area" hx-push-url="#home">All posts</a>\n')
+        
+        with open(index_file, 'r', encoding='utf-8') as f:
+            html = f.read()
+        html = self._replace_marked_section(html, 'critical-css', f"\n    <style>{critical_css}</style>\n    ")
+        html = self._replace_marked_section(html, 'first-paint', f"\n{latest_html}")
+        with open(index_file, 'w', encoding='utf-8') as f:
+            f.write(html)
+        
+        print(f"Inlined {min(len(posts), self.first_paint_items)} index items and "
+              f"{len(critical_css)} bytes of critical CSS into index.html")
+
+    def _generate_site_manifest(self, posts, posts_by_tag):
+        """Generate site-manifest.json with fragment sizes and per-view prefetch hints"""
+        webpage_dir = self.base_dir / 'webpage'
+        fragments = {}
+        for path in sorted(self.indexes_dir.glob('*.html')) + sorted((webpage_dir / 'about').glob('*.html')):
+            fragments[f"/{path.relative_to(self.base_dir)}"] = path.stat().st_size
+        for post in posts:
+            post_file = self.posts_dir / post['path'] / 'post.html'
+            fragments[post['url']] = post_file.stat().st_size
+        
+        # Views are keyed by the hash the client navigates to
+        latest = [post['url'] for post in posts[:self.prefetch_items]]
+        prefetch = {
+            '#home': latest + [f"/webpage/indexes/index-{tag}.html" for tag in sorted(posts_by_tag)],
+        }
+        for tag, tag_posts in posts_by_tag.items():
+            prefetch[f"#{tag}"] = [post['url'] for post in tag_posts[:self.prefetch_items]]
+        
+        manifest = {
+            'fragments': fragments,
+            'prefetch': prefetch
+        }
+        with open(webpage_dir / 'site-manifest.json', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        
+        print(f"Generated site-manifest.json with {len(fragments)} fragments")
+
+    def generate_all_indexes(self, verify_related=False):
         """Generate all index files"""
         print("Generating indexes...")
         
@@ -194,6 +553,10 @@ class IndexGenerator:
         # Generate search.json
         self._generate_search_json(posts)
         
+        # Generate related posts and the tag co-occurrence index
+        self._generate_related_posts(posts, verify=verify_related)
+        self._generate_tag_index(posts)
+        
         # Generate index for all posts with quote section
         # Generate index for all posts with quote section
         quote_section_html = """<!-- Quote section -->
@@ -224,7 +587,16 @@ class IndexGenerator:
                 f.write(tag_html)
         
         print(f"Generated {len(posts_by_tag) + 1} index files.")
+        
+        # Inline the first paint bundle and list fragments for idle prefetching
+        self._generate_first_paint(posts, quote_section_html)
+        self._generate_site_manifest(posts, posts_by_tag)
 
 if __name__ == "__main__":
-    generator = IndexGenerator()
-    generator.generate_all_indexes()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate index files, search data and related posts")
+    parser.add_argument('--base-dir', help="Base directory of the website (default: /app)")
+    parser.add_argument('--verify-related', action='store_true', help="Check incremental related posts against a cold rebuild")
+    args = parser.parse_args()
+    
+    generator = IndexGenerator(args.base_dir)
+    generator.generate_all_indexes(verify_related=args.verify_related)
\ No newline at end of file
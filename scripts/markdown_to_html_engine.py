@@ -7,27 +7,25 @@ from pathlib import Path
 from datetime import datetime
 import markdown
 import urllib.parse
+import hashlib
+import subprocess
 from dotenv import load_dotenv
 
 class PostGenerator:
-    def __init__(self, base_dir: str = None):
-        # Load environment variables
-        load_dotenv()
-        
-        # Use provided base_dir or determine based on environment
+    VIDEO_EXTENSIONS = {'.mp4', '.webm', '.ogg', '.mov'}
+    VIDEO_MIME_TYPES = {'.mov': 'video/quicktime'}
+    
+    # (height, max bitrate) renditions produced when transcode_videos is enabled
+    VIDEO_RENDITIONS = [(720, '2500k'), (480, '1000k')]
+
+    def __init__(self, base_dir: str = None, obsidian_path: str = None,
+                 post_path: str = None, title: str = None, date: str = None, tags: list = None,
+                 transcode_videos: bool = False):
+        # Use provided base_dir or fall back to the Docker mount
         self.base_dir = Path(base_dir if base_dir else '/app')
-        
-        # Get the actual post path from environment
-        post_path_env = os.getenv('POST_PATH', '')
-        # If it's a real path that exists, use it directly
-        if post_path_env and Path(post_path_env).exists():
-            self.post_path = Path(post_path_env)
-        else:
-            # Fall back to the default Docker path for backward compatibility
-            self.post_path = Path('/input/post.md')
+        self.obsidian_path = Path(obsidian_path if obsidian_path else '/input/obsidian')
             
         # Set up other paths
-        self.obsidian_path = Path('/input/obsidian')
         self.output_dir = self.base_dir / 'webpage'
         self.template_dir = self.base_dir / 'templates'
         self.indexes_dir = self.output_dir / 'indexes'
@@ -37,17 +35,18 @@ class PostGenerator:
         self.index_template = self.template_dir / 'index_template.html'
         self.section_template = self.template_dir / 'section_template.html'
         
-        # Clean configuration from env
-        self.post_title = os.getenv('POST_TITLE', '').strip().strip('"\'')
-        self.post_date = os.getenv('POST_DATE', '').strip().strip('"\'') or datetime.now().strftime('%Y-%m-%d')
+        # Video posters and renditions are cached by source content hash
+        self.media_cache_dir = self.base_dir / '.cache' / 'media'
+        self.transcode_videos = transcode_videos
+        self.ffmpeg = shutil.which('ffmpeg')
+        self.ffprobe = shutil.which('ffprobe')
         
-        # Get tags from environment
-        self.post_tags = os.getenv('POST_TAGS', '').strip().strip('"\'').split(',')
-        # Filter out empty strings from the tags list
-        self.post_tags = [tag for tag in self.post_tags if tag]
-        # If no tags were specified but post_type is set, use that as a default tag
-        if not self.post_tags and self.post_type:
-            self.post_tags = [self.post_type]
+        # Shared state, built once and reused for every post this instance generates
+        self._vault_index = None
+        self._post_template_text = None
+        self._converter = markdown.Markdown(
+            extensions=['extra', 'meta', 'fenced_code', 'nl2br', 'sane_lists', 'codehilite']
+        )
         
         # Create necessary directories
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -55,12 +54,38 @@ class PostGenerator:
         
         # Validate environment after setup
         self._validate_environment()
+        
+        self.post_path = None
+        if post_path:
+            self.set_post(post_path, title, date, tags)
+
+    def set_post(self, post_path: str, title: str = None, date: str = None, tags: list = None):
+        """Configure the post that the next call to generate() will publish"""
+        self.post_path = Path(post_path)
+        self.post_title = (title or '').strip().strip('"\'')
+        self.post_date = (date or '').strip().strip('"\'') or datetime.now().strftime('%Y-%m-%d')
+        
+        # Accept either a list of tags or a comma separated string
+        if isinstance(tags, str):
+            tags = tags.split(',')
+        # Filter out empty strings from the tags list
+        self.post_tags = [tag.strip() for tag in (tags or []) if tag and tag.strip()]
+        
+        self._validate_post()
 
     def _validate_environment(self):
         """Validate all required paths and configuration"""
         if not self.obsidian_path.exists():
             raise FileNotFoundError(f"Obsidian vault not mounted at: {self.obsidian_path}")
+
+        if not self.template_dir.exists():
+            raise FileNotFoundError(f"Template directory not found: {self.template_dir}")
             
+        if not self.post_template.exists():
+            raise FileNotFoundError(f"Template not found: {self.post_template}")
+
+    def _validate_post(self):
+        """Validate the configured post file and fill in defaults"""
         if not self.post_path.exists():
             raise FileNotFoundError(f"Markdown file not found at: {self.post_path}")
             
@@ -73,16 +98,26 @@ class PostGenerator:
         except Exception as e:
             raise IOError(f"Cannot read post file at {self.post_path}: {e}")
 
-        if not self.template_dir.exists():
-            raise FileNotFoundError(f"Template directory not found: {self.template_dir}")
-            
-        if not self.post_template.exists():
-            raise FileNotFoundError(f"Template not found: {self.post_template}")
-            
+        try:
+            datetime.strptime(self.post_date, '%Y-%m-%d')
+        except ValueError:
+            raise ValueError(f"Post date must be in YYYY-MM-DD format: {self.post_date}")
             
-        if not self.post_title and self.post_path:
+        if not self.post_title:
             self.post_title = self.post_path.stem
 
+    def _build_vault_index(self) -> dict:
+        """Walk the Obsidian vault once and map lowercase file names to paths"""
+        index = {}
+        try:
+            for file_path in self.obsidian_path.rglob('*'):
+                if file_path.is_file():
+                    # Keep the first match, like the previous recursive search did
+                    index.setdefault(file_path.name.lower(), file_path)
+        except Exception as e:
+            print(f"Warning: Error indexing Obsidian vault: {e}")
+        return index
+
     def _find_image(self, filename: str) -> Path:
         """Find image in mounted Obsidian vault"""
         filename = filename.strip()
@@ -92,18 +127,146 @@ class PostGenerator:
         if direct_path.exists() and direct_path.is_file():
             return direct_path
             
-        # Search for file recursively
+        # Fall back to the vault index, built on first use
+        if self._vault_index is None:
+            self._vault_index = self._build_vault_index()
+            
+        return self._vault_index.get(Path(filename).name.lower())
+
+    def _file_hash(self, file_path: Path) -> str:
+        """Return a short content hash used as the media cache key"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()[:16]
+
+    def _run_ffmpeg(self, args: list, output_path: Path) -> bool:
+        """Run ffmpeg writing to a temp file, then move it into place"""
+        tmp_path = output_path.with_name(f".{output_path.name}.tmp{output_path.suffix}")
         try:
-            pattern = filename.lower()
-            for file_path in self.obsidian_path.rglob('*'):
-                if file_path.is_file() and file_path.name.lower() == pattern:
-                    return file_path
-        except Exception as e:
-            print(f"Warning: Error searching for image {filename}: {e}")
+            subprocess.run([self.ffmpeg, '-y', '-v', 'error', *args, str(tmp_path)],
+                           check=True, capture_output=True)
+            tmp_path.replace(output_path)
+            return True
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"Warning: ffmpeg failed for {output_path.name}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return False
+
+    def _probe_video(self, file_path: Path) -> tuple:
+        """Return the displayed (width, height) of the first video stream, or None"""
+        if not self.ffprobe:
+            return None
+        try:
+            result = subprocess.run(
+                [self.ffprobe, '-v', 'error', '-select_streams', 'v:0',
+                 '-show_entries', 'stream=width,height:stream_tags=rotate:stream_side_data=rotation',
+                 '-of', 'json', str(file_path)],
+                check=True, capture_output=True, text=True
+            )
+            stream = json.loads(result.stdout)['streams'][0]
+            width, height = int(stream['width']), int(stream['height'])
             
-        return None
+            # Phone recordings store the frame sideways plus a rotation, which
+            # ffmpeg applies when it writes posters and renditions
+            rotation = stream.get('tags', {}).get('rotate', 0)
+            for side_data in stream.get('side_data_list', []):
+                rotation = side_data.get('rotation', rotation)
+            if abs(int(float(rotation))) % 180 == 90:
+                width, height = height, width
+            
+            return width, height
+        except (subprocess.CalledProcessError, OSError, ValueError, KeyError, IndexError) as e:
+            print(f"Warning: Could not probe video {file_path.name}: {e}")
+            return None
 
-    # Update the _process_wikilinks method in markdown_to_html_engine.py
+    def _generate_poster(self, file_path: Path, digest: str):
+        """Extract a representative frame as a JPEG poster, cached by content hash"""
+        poster = self.media_cache_dir / f"{digest}_poster.jpg"
+        if not poster.exists():
+            args = ['-i', str(file_path), '-vf', 'thumbnail,scale=min(1280\\,iw):-2',
+                    '-frames:v', '1', '-q:v', '4']
+            if not self._run_ffmpeg(args, poster):
+                return None
+        return poster
+
+    def _transcode_video(self, file_path: Path, digest: str, source_height: int) -> list:
+        """Transcode to the H.264 rendition ladder, cached by content hash"""
+        renditions = []
+        for height, bitrate in self.VIDEO_RENDITIONS:
+            # Never upscale
+            if height >= source_height:
+                continue
+            
+            output = self.media_cache_dir / f"{digest}_{height}p.mp4"
+            if not output.exists():
+                bufsize = f"{int(bitrate[:-1]) * 2}k"
+                args = ['-i', str(file_path), '-vf', f'scale=-2:{height}',
+                        '-c:v', 'libx264', '-preset', 'slow', '-crf', '23',
+                        '-maxrate', bitrate, '-bufsize', bufsize,
+                        '-c:a', 'aac', '-b:a', '128k', '-movflags', '+faststart']
+                if not self._run_ffmpeg(args, output):
+                    continue
+            renditions.append((height, output))
+        return renditions
+
+    def _process_video(self, file_path: Path, post_dir: Path) -> str:
+        """Copy or transcode a video and build a lazy <video> tag with a poster"""
+        url_base = f"/webpage/posts/{post_dir.name}"
+        extension = file_path.suffix.lower()
+        dimensions = self._probe_video(file_path)
+        
+        poster_url = None
+        renditions = []
+        if self.ffmpeg:
+            self.media_cache_dir.mkdir(parents=True, exist_ok=True)
+            digest = self._file_hash(file_path)
+            
+            poster = self._generate_poster(file_path, digest)
+            if poster:
+                poster_name = f"{file_path.stem}_poster.jpg"
+                shutil.copy2(poster, post_dir / poster_name)
+                poster_url = f"{url_base}/{urllib.parse.quote(poster_name)}"
+            
+            if self.transcode_videos and dimensions:
+                renditions = self._transcode_video(file_path, digest, dimensions[1])
+        else:
+            print(f"Warning: ffmpeg not found, no poster generated for {file_path.name}")
+        
+        sources = []
+        if renditions:
+            # Largest first; browsers play the first source whose media query matches
+            for i, (height, cached) in enumerate(renditions):
+                name = f"{file_path.stem}_{height}p.mp4"
+                shutil.copy2(cached, post_dir / name)
+                media = ''
+                if i < len(renditions) - 1 and dimensions:
+                    min_width = dimensions[0] * height // dimensions[1]
+                    media = f' media="(min-width: {min_width}px)"'
+                sources.append(f'<source src="{url_base}/{urllib.parse.quote(name)}" type="video/mp4"{media} />')
+            
+            # Report the dimensions of the largest rendition
+            height = renditions[0][0]
+            dimensions = (dimensions[0] * height // dimensions[1], height)
+        else:
+            shutil.copy2(file_path, post_dir / file_path.name)
+            mime_type = self.VIDEO_MIME_TYPES.get(extension, f"video/{extension[1:]}")
+            sources.append(f'<source src="{url_base}/{urllib.parse.quote(file_path.name)}" type="{mime_type}" />')
+        
+        attributes = 'controls preload="none"'
+        if poster_url:
+            attributes += f' poster="{poster_url}"'
+        if dimensions:
+            attributes += f' width="{dimensions[0]}" height="{dimensions[1]}"'
+        
+        sources_html = '\n            '.join(sources)
+        return f'''<figure>
+        <video {attributes}>
+            {sources_html}
+            Your browser does not support the video tag.
+        </video>
+    </figure>'''
 
     def _process_wikilinks(self, content: str, post_dir: Path) -> str:
         """Process Obsidian wikilinks and copy referenced files"""
@@ -115,28 +278,20 @@ class PostGenerator:
             file_path = self._find_image(filename)
             
             if file_path and file_path.is_file():
+                # Videos get a poster frame and are only fetched on play
+                if file_path.suffix.lower() in self.VIDEO_EXTENSIONS:
+                    return self._process_video(file_path, post_dir)
+                
                 new_name = file_path.name
                 new_path = post_dir / new_name
                 shutil.copy2(file_path, new_path)
                 encoded_name = urllib.parse.quote(new_name)
                 
-                # Add absolute path for the file - this is the key change
+                # Add absolute path for the file
                 absolute_path = f"/webpage/posts/{post_dir_name}/{encoded_name}"
                 
-                # Check file extension to determine if it's a video
-                extension = file_path.suffix.lower()
-                video_extensions = {'.mp4', '.webm', '.ogg', '.mov'}
-                
-                if extension in video_extensions:
-                    return f'''<figure>
-        <video controls>
-            <source src="{absolute_path}" type="video/{extension[1:]}" />
-            Your browser does not support the video tag.
-        </video>
-    </figure>'''
-                else:
-                    return f'''<figure>
-        <img src="{absolute_path}" alt="{new_name}" />
+                return f'''<figure>
+        <img src="{absolute_path}" alt="{new_name}" loading="lazy" decoding="async" />
     </figure>'''
             
             print(f"Warning: File not found: {filename}")
@@ -178,6 +333,9 @@ class PostGenerator:
 
     def generate(self):
         """Generate all required files"""
+        if self.post_path is None:
+            raise ValueError("No post configured; call set_post() first")
+            
         try:
             # Read markdown content
             with open(self.post_path, 'r', encoding='utf-8') as f:
@@ -191,14 +349,13 @@ class PostGenerator:
             
             # Process content
             content = self._process_wikilinks(content, post_dir)
-            html_content = markdown.markdown(
-                content,
-                extensions=['extra', 'meta', 'fenced_code', 'nl2br', 'sane_lists', 'codehilite']
-            )
+            html_content = self._converter.reset().convert(content)
             
             # Generate post HTML
-            with open(self.post_template, 'r', encoding='utf-8') as f:
-                template = f.read()
+            if self._post_template_text is None:
+                with open(self.post_template, 'r', encoding='utf-8') as f:
+                    self._post_template_text = f.read()
+            template = self._post_template_text
             
             post_vars = {
                 'title': self.post_title,
@@ -250,8 +407,16 @@ class PostGenerator:
         return result
 
 if __name__ == '__main__':
+    # Single post mode, configured through the environment (see post_gui.py for
+    # the interactive front end and publish_posts.py for batch publishing)
+    load_dotenv()
     try:
-        generator = PostGenerator()
+        generator = PostGenerator(
+            post_path=os.getenv('POST_PATH') or '/input/post.md',
+            title=os.getenv('POST_TITLE'),
+            date=os.getenv('POST_DATE'),
+            tags=os.getenv('POST_TAGS', '').strip().strip('"\''),
+        )
         generator.generate()
     except Exception as e:
         print(f"Error generating post: {e}")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+import re
+import json
+import hashlib
+import argparse
+from pathlib import Path
+
+# Elements whose contents must be left exactly as written
+PRESERVED_HTML_RE = re.compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.S | re.I)
+HTML_COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.S)
+
+# CSS strings are kept verbatim, comments are dropped
+CSS_TOKEN_RE = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+
+# /webpage/style/main.css or an already fingerprinted /webpage/style/main.1a2b3c4d.css
+ASSET_REF_RE = re.compile(r'(/webpage/(?:style|js)/)([\w-]+?)(?:\.[0-9a-f]{8})?\.(css|js)\b')
+FINGERPRINT_RE = re.compile(r'^[\w-]+\.[0-9a-f]{8}\.(css|js)$')
+
+def minify_html(html):
+    """Drop comments and collapse whitespace, leaving <pre>, <textarea>, <script> and <style> intact"""
+    def squeeze(text):
+        text = HTML_COMMENT_RE.sub('', text)
+        return re.sub(r'\s+', ' ', text)
+
+    parts = []
+    last = 0
+    for match in PRESERVED_HTML_RE.finditer(html):
+        parts.append(squeeze(html[last:match.start()]))
+        parts.append(match.group(0))
+        last = match.end()
+    parts.append(squeeze(html[last:]))
+
+    return ''.join(parts).strip()
+
+def minify_css(css):
+    """Drop comments and redundant whitespace without touching string literals"""
+    def squeeze(text):
+        text = re.sub(r'\s+', ' ', text)
+        # Spaces around + - > ~ are left alone since calc() and selectors depend on them
+        text = re.sub(r'\s*([{};,])\s*', r'\1', text)
+        text = re.sub(r':\s+', ':', text)
+        return text.replace(';}', '}')
+
+    # Comments are cut out before squeezing so the whitespace around them merges
+    parts = []
+    pending = ''
+    last = 0
+    for match in CSS_TOKEN_RE.finditer(css):
+        pending += css[last:match.start()]
+        if match.group(1):
+            parts.append(squeeze(pending))
+            parts.append(match.group(1))
+            pending = ''
+        last = match.end()
+    parts.append(squeeze(pending + css[last:]))
+
+    return ''.join(parts).strip()
+
+def _write_if_changed(path, content):
+    """Write content to path, returning True if the file changed"""
+    if path.exists() and path.read_text(encoding='utf-8') == content:
+        return False
+    path.write_text(content, encoding='utf-8')
+    return True
+
+def minify_pages(base_dir):
+    """Minify generated post pages and index fragments in place"""
+    webpage_dir = base_dir / 'webpage'
+    pages = list(webpage_dir.glob('posts/*/post.html')) + list(webpage_dir.glob('indexes/*.html'))
+
+    updated = 0
+    for page in pages:
+        html = page.read_text(encoding='utf-8')
+        if _write_if_changed(page, minify_html(html)):
+            updated += 1
+
+    print(f"Minified {updated} of {len(pages)} HTML files")
+    return updated
+
+def refresh_manifest_sizes(base_dir):
+    """Update fragment sizes in site-manifest.json after minification"""
+    manifest_file = base_dir / 'webpage' / 'site-manifest.json'
+    if not manifest_file.exists():
+        return False
+
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    for url in manifest.get('fragments', {}):
+        path = base_dir / url.lstrip('/')
+        if path.exists():
+            manifest['fragments'][url] = path.stat().st_size
+
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return True
+
+def fingerprint_assets(base_dir):
+    """
+    Write content-hashed copies of the stylesheets and scripts
+
+    Returns a mapping from logical name (e.g. main.css) to fingerprinted name
+    (e.g. main.1a2b3c4d.css). Stylesheets are minified before hashing; stale
+    fingerprinted copies of the same asset are removed.
+    """
+    webpage_dir = base_dir / 'webpage'
+    sources = list((webpage_dir / 'style').glob('*.css')) + list((webpage_dir / 'js').glob('*.js'))
+
+    manifest = {}
+    for source in sources:
+        if FINGERPRINT_RE.match(source.name):
+            continue
+
+        content = source.read_text(encoding='utf-8')
+        if source.suffix == '.css':
+            content = minify_css(content)
+
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:8]
+        fingerprinted = source.with_name(f"{source.stem}.{digest}{source.suffix}")
+        _write_if_changed(fingerprinted, content)
+        manifest[source.name] = fingerprinted.name
+
+        # Remove copies left over from earlier builds
+        for stale in source.parent.glob(f"{source.stem}.*{source.suffix}"):
+            if stale != fingerprinted and FINGERPRINT_RE.match(stale.name):
+                stale.unlink()
+
+    print(f"Fingerprinted {len(manifest)} assets")
+    return manifest
+
+def rewrite_asset_references(base_dir, manifest):
+    """Point asset URLs in index.html and the templates at the fingerprinted files"""
+    def replace(match):
+        prefix, stem, extension = match.groups()
+        logical = f"{stem}.{extension}"
+        if logical not in manifest:
+            return match.group(0)
+        return f"{prefix}{manifest[logical]}"
+
+    files = [base_dir / 'index.html'] + list((base_dir / 'templates').glob('*.html'))
+
+    updated = 0
+    for path in files:
+        if not path.exists():
+            continue
+        content = path.read_text(encoding='utf-8')
+        if _write_if_changed(path, ASSET_REF_RE.sub(replace, content)):
+            updated += 1
+            print(f"Rewrote asset references in {path.relative_to(base_dir)}")
+
+    return updated
+
+def optimize_site(base_dir=None, minify=True, fingerprint=True):
+    """
+    Minify generated HTML and fingerprint static assets
+
+    Args:
+        base_dir: Base directory of the website
+        minify: If True, minify post pages and index fragments in place
+        fingerprint: If True, write hashed asset copies and rewrite references
+    """
+    base_dir = Path(base_dir if base_dir else '.')
+
+    if minify:
+        minify_pages(base_dir)
+        refresh_manifest_sizes(base_dir)
+
+    if fingerprint:
+        manifest = fingerprint_assets(base_dir)
+        rewrite_asset_references(base_dir, manifest)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Minify generated HTML and fingerprint static assets")
+    parser.add_argument('--base-dir', help="Base directory of the website (default: current directory)")
+    parser.add_argument('--no-minify', action='store_true', help="Don't minify post pages and index fragments")
+    parser.add_argument('--no-fingerprint', action='store_true', help="Don't fingerprint CSS/JS or rewrite references")
+    args = parser.parse_args()
+
+    optimize_site(args.base_dir, not args.no_minify, not args.no_fingerprint)
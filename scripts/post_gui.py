@@ -1,5 +1,4 @@
 #!/usr/bin/env python3
-import os
 import sys
 import tkinter as tk
 from tkinter import filedialog, ttk
@@ -136,14 +135,6 @@ class PostCreatorGUI:
             self._log_status("Error: Date must be in YYYY-MM-DD format.")
             return
         
-        # Set environment variables
-        os.environ['POST_TYPE'] = self.post_type.get()
-        os.environ['POST_TITLE'] = self.post_title.get()
-        os.environ['POST_DATE'] = self.post_date.get()
-        
-        # Set tags environment variable
-        os.environ['POST_TAGS'] = ','.join(self._get_selected_tags())
-        
         # Get the file path relative to the Obsidian mount
         obsidian_dir = "/app/obsidian"  # This matches your Docker mount
         
@@ -157,9 +148,6 @@ class PostCreatorGUI:
                 # File is outside the Obsidian directory, can't use it directly
                 self._log_status(f"Error: File must be in the Obsidian directory: {obsidian_dir}")
                 return
-                
-            os.environ['POST_PATH'] = docker_file_path
-            os.environ['OBSIDIAN_PATH'] = '/input/obsidian'  # Path for PostGenerator to use
             
             self._log_status(f"Using file path: {docker_file_path}")
         except Exception as e:
@@ -170,7 +158,13 @@ class PostCreatorGUI:
         
         try:
             # Generate post
-            generator = PostGenerator()
+            generator = PostGenerator(
+                obsidian_path='/input/obsidian',
+                post_path=docker_file_path,
+                title=self.post_title.get(),
+                date=self.post_date.get(),
+                tags=self._get_selected_tags(),
+            )
             output_dir = generator.generate()
             
             self._log_status(f"Post generated successfully in {output_dir}")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+import json
+import argparse
+from pathlib import Path
+
+import yaml
+
+from markdown_to_html_engine import PostGenerator
+from index_generator import IndexGenerator
+from check_links import check_site
+
+def load_manifest(manifest_path):
+    """
+    Load a YAML or JSON manifest describing the posts to publish
+
+    The manifest is either a list of post entries or a mapping with a `posts`
+    list and an optional `obsidian_path`. Each entry needs a `path` and may set
+    `title`, `date` (YYYY-MM-DD) and `tags` (list or comma separated string).
+
+    Args:
+        manifest_path: Path to a .yaml/.yml or .json manifest
+    """
+    manifest_path = Path(manifest_path)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            if manifest_path.suffix.lower() == '.json':
+                manifest = json.load(f)
+            else:
+                manifest = yaml.safe_load(f)
+    except (yaml.YAMLError, ValueError) as e:
+        raise ValueError(f"Invalid manifest {manifest_path}: {e}")
+
+    if isinstance(manifest, list):
+        manifest = {'posts': manifest}
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('posts'), list):
+        raise ValueError(f"Manifest must be a list of posts or contain a 'posts' list: {manifest_path}")
+
+    for entry in manifest['posts']:
+        if not isinstance(entry, dict) or not entry.get('path'):
+            raise ValueError(f"Every manifest entry needs a 'path': {entry}")
+
+    return manifest
+
+def _resolve_post_path(path, obsidian_path, manifest_dir):
+    """Resolve a post path against the vault first, then the manifest directory"""
+    path = Path(path)
+    if path.is_absolute():
+        return path
+
+    for root in (obsidian_path, manifest_dir):
+        candidate = root / path
+        if candidate.exists():
+            return candidate
+
+    return obsidian_path / path
+
+def publish_posts(manifest_path, base_dir=None, obsidian_path=None, update_indexes=True, transcode_videos=False):
+    """
+    Publish every post in a manifest with a single PostGenerator
+
+    The vault index, markdown converter and post template are loaded once and
+    shared by all posts; indexes are regenerated once at the end.
+
+    Args:
+        manifest_path: Path to a .yaml/.yml or .json manifest
+        base_dir: Base directory of the website (default: /app)
+        obsidian_path: Obsidian vault to resolve posts and media against
+        update_indexes: If True, regenerate the index files after publishing
+        transcode_videos: If True, transcode embedded videos to the web rendition ladder
+    """
+    manifest = load_manifest(manifest_path)
+    manifest_dir = Path(manifest_path).resolve().parent
+    obsidian_path = Path(obsidian_path or manifest.get('obsidian_path') or '/input/obsidian')
+
+    generator = PostGenerator(base_dir=base_dir, obsidian_path=obsidian_path, transcode_videos=transcode_videos)
+
+    published = 0
+    errors = 0
+
+    for entry in manifest['posts']:
+        post_path = _resolve_post_path(entry['path'], obsidian_path, manifest_dir)
+        try:
+            generator.set_post(
+                post_path,
+                title=entry.get('title'),
+                date=str(entry['date']) if entry.get('date') else None,
+                tags=entry.get('tags'),
+            )
+            generator.generate()
+            published += 1
+        except Exception as e:
+            print(f"Error publishing {post_path}: {e}")
+            errors += 1
+
+    if update_indexes and published:
+        IndexGenerator(generator.base_dir).generate_all_indexes()
+
+    # Verify the generated site so broken media shows up now rather than by eye
+    report = check_site(generator.base_dir)
+    for link in report['broken_links']:
+        print(f"Broken {link['attribute']} in {link['page']}:{link['line']}: {link['url']}")
+    for media in report['missing_media']:
+        print(f"Missing media in {media['page']}: {media['file']}")
+
+    # Print summary
+    print(f"\nSummary: Published {published} posts, encountered {errors} errors, "
+          f"{len(report['broken_links'])} broken links, {len(report['missing_media'])} missing media")
+    return published, errors
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish a batch of posts from a YAML or JSON manifest")
+    parser.add_argument('manifest', help="Path to the manifest file (.yaml, .yml or .json)")
+    parser.add_argument('--base-dir', help="Base directory of the website (default: /app)")
+    parser.add_argument('--obsidian-path', help="Obsidian vault path (default: manifest value or /input/obsidian)")
+    parser.add_argument('--no-index', action='store_true', help="Don't regenerate index files after publishing")
+    parser.add_argument('--transcode-videos', action='store_true', help="Transcode embedded videos to web-friendly renditions (requires ffmpeg)")
+    args = parser.parse_args()
+
+    try:
+        _, errors = publish_posts(args.manifest, args.base_dir, args.obsidian_path,
+                                  not args.no_index, args.transcode_videos)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        exit(1)
+    if errors:
+        exit(1)
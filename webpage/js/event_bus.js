@@ -138,6 +138,9 @@ async findPostContext(postPath) {
 let navigationCreationInProgress = false;
 let pendingNavigationCall = false;
 
+// index.html clones the inlined latest home items on a cold visit to #home
+let prerenderedHomeAvailable = true;
+
 
 // Enhanced content loading with context extraction
 async function loadContent(url, targetElement) {
@@ -238,6 +241,11 @@ async function createNavigationOverlays() {
         
         // Create bottom navigation for all screen sizes
         createPostNavigation(prevPost, nextPost);
+        
+        // Show precomputed related posts, fetched only when a post is opened
+        if (typeof window.relatedPosts !== 'undefined') {
+            window.relatedPosts.render(currentPostPath);
+        }
     } finally {
         navigationCreationInProgress = false;
         
@@ -406,6 +414,20 @@ async function loadContentFromHash() {
     
     if (!contentArea) return;
     
+    // Use the inlined home content on the first load instead of fetching it again
+    if (prerenderedHomeAvailable) {
+        prerenderedHomeAvailable = false;
+        if (hash === '#home' && contentArea.querySelector('.index-container')) {
+            htmx.process(contentArea);
+            initializeIndexItems(contentArea);
+            extractNavigationContext(contentArea.innerHTML, '/webpage/indexes/index-all.html');
+            // Only the latest items are inlined, so fetch the full list when it is needed
+            delete NavigationContext.contextPosts['all'];
+            updateActiveNavItem(hash);
+            return;
+        }
+    }
+    
     let contentUrl;
     
     // Check if it's a post URL (format: #post/YYYYMMDD_title)
@@ -0,0 +1,72 @@
+/**
+ * prefetch.js - Prefetches the likely next views while the browser is idle
+ */
+
+const Prefetcher = {
+    manifest: null,
+    prefetched: new Set(),
+    maxBytes: 100000, // Skip fragments larger than this
+
+    async loadManifest() {
+        if (this.manifest) {
+            return this.manifest;
+        }
+
+        try {
+            const response = await fetch('/webpage/site-manifest.json');
+            if (response.ok) {
+                this.manifest = await response.json();
+            }
+        } catch (error) {
+            console.error('Error loading site manifest:', error);
+        }
+
+        return this.manifest;
+    },
+
+    // Respect data saver and very slow connections
+    shouldPrefetch() {
+        const connection = navigator.connection;
+        return !(connection && (connection.saveData || /2g/.test(connection.effectiveType || '')));
+    },
+
+    prefetch(url) {
+        if (this.prefetched.has(url)) return;
+        this.prefetched.add(url);
+
+        const link = document.createElement('link');
+        link.rel = 'prefetch';
+        link.href = url;
+        document.head.appendChild(link);
+    },
+
+    async prefetchFor(hash) {
+        if (!this.shouldPrefetch()) return;
+
+        const manifest = await this.loadManifest();
+        if (!manifest) return;
+
+        const hints = manifest.prefetch[hash] || [];
+        hints.forEach(url => {
+            const size = manifest.fragments[url];
+            if (size === undefined || size <= this.maxBytes) {
+                this.prefetch(url);
+            }
+        });
+    },
+
+    schedule() {
+        const run = () => this.prefetchFor(window.location.hash || '#home');
+        if ('requestIdleCallback' in window) {
+            requestIdleCallback(run, { timeout: 3000 });
+        } else {
+            setTimeout(run, 1500);
+        }
+    }
+};
+
+window.prefetcher = Prefetcher;
+
+window.addEventListener('load', () => Prefetcher.schedule());
+window.addEventListener('hashchange', () => Prefetcher.schedule());
+document.body.addEventListener('htmx:pushedIntoHistory', () => Prefetcher.schedule());
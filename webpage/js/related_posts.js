@@ -0,0 +1,66 @@
+/**
+ * related_posts.js - Shows the precomputed related posts under a post
+ */
+
+const RelatedPosts = {
+    cache: {}, // related.json contents keyed by post path
+
+    async load(postPath) {
+        if (this.cache[postPath]) {
+            return this.cache[postPath];
+        }
+
+        try {
+            const response = await fetch(`/webpage/posts/${postPath}/related.json`);
+            if (response.ok) {
+                this.cache[postPath] = await response.json();
+                return this.cache[postPath];
+            }
+        } catch (error) {
+            console.error('Error loading related posts:', error);
+        }
+
+        return [];
+    },
+
+    async render(postPath) {
+        const related = await this.load(postPath);
+
+        // The visitor may have moved on while we were fetching
+        const contentArea = document.getElementById('content-area');
+        if (!contentArea || window.location.hash !== `#post/${postPath}`) return;
+
+        document.querySelectorAll('.related-posts').forEach(el => el.remove());
+        if (!related.length) return;
+
+        const aside = document.createElement('aside');
+        aside.className = 'related-posts';
+        aside.setAttribute('aria-label', 'Related posts');
+
+        const heading = document.createElement('h2');
+        heading.className = 'related-posts-title';
+        heading.textContent = 'Related';
+        aside.appendChild(heading);
+
+        const list = document.createElement('ul');
+        related.forEach(post => {
+            const item = document.createElement('li');
+            const link = document.createElement('a');
+            link.href = `#post/${post.path}`;
+            link.textContent = post.title;
+            link.addEventListener('click', (e) => {
+                e.preventDefault();
+                navigateToPost(post);
+            });
+            item.appendChild(link);
+            list.appendChild(item);
+        });
+        aside.appendChild(list);
+
+        // Keep related posts above the previous/next navigation
+        const nav = contentArea.querySelector('.post-navigation');
+        contentArea.insertBefore(aside, nav);
+    }
+};
+
+window.relatedPosts = RelatedPosts;